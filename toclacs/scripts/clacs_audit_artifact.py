@@ -3,8 +3,11 @@
 from __future__ import annotations
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Optional
 import sys
 from clacs_core import (
+    Artefact,
+    ProjectConfig,
     load_project_config,
     compute_phi,
     parse_yaml_front_matter,
@@ -13,21 +16,25 @@ from clacs_core import (
 )
 
 
-def audit_file(path: Path) -> None:
-    cfg = load_project_config()
+def audit_fruto(
+    cfg: ProjectConfig,
+    path: Path,
+    artefact_id: str,
+    sesion_id: str,
+    campo_id: str = "S01",
+    tipo: str = "texto",
+    index: Optional[Dict[str, Artefact]] = None,
+) -> Dict[str, object]:
+    """
+    Versión no interactiva de la auditoría: escribe el YAML front-matter y
+    devuelve los metadatos escritos.
+    """
     if not path.exists():
         raise FileNotFoundError(f"Archivo no encontrado: {path}")
-
-    artefact_id = input("ID del artefacto en clacs_project.json (ej. e3): ").strip()
     if not artefact_id:
         raise ValueError("ID de artefacto no puede estar vacío.")
 
-    phi_val = compute_phi(cfg, artefact_id)
-    print(f"Φ_CLACS({artefact_id}) = {phi_val:.4f}")
-
-    sesion_id = input("sesion_id (ej. 2025-11-26_sesion-001): ").strip()
-    campo_id = input("campo_id (ej. S01): ").strip() or "S01"
-    tipo = input("tipo de fruto (ej. texto, visual): ").strip() or "texto"
+    phi_val = compute_phi(cfg, artefact_id, index=index)
 
     now_iso = datetime.now().isoformat(timespec="seconds")
 
@@ -49,20 +56,41 @@ def audit_file(path: Path) -> None:
         "timestamp": now_iso,
     })
 
+    # Evitar perder separación si el cuerpo no empieza con salto de línea.
+    # El hash se calcula sobre el cuerpo tal como se volverá a leer al sellar.
+    if body and not body.startswith("\n"):
+        body = "\n" + body
+
     hash10 = compute_hash10_from_body(body)
     yaml_data["hash10"] = hash10
 
     front = dump_yaml_front_matter(yaml_data)
-    # Evitar perder separación si el cuerpo no empieza con salto de línea
-    if body and not body.startswith("\n"):
-        new_text = front + "\n" + body
-    else:
-        new_text = front + body
+    new_text = front + body
 
     path.write_text(new_text, encoding="utf-8")
+    return yaml_data
+
+
+def audit_file(path: Path) -> None:
+    cfg = load_project_config()
+    if not path.exists():
+        raise FileNotFoundError(f"Archivo no encontrado: {path}")
+
+    artefact_id = input("ID del artefacto en clacs_project.json (ej. e3): ").strip()
+    if not artefact_id:
+        raise ValueError("ID de artefacto no puede estar vacío.")
+
+    phi_val = compute_phi(cfg, artefact_id)
+    print(f"Φ_CLACS({artefact_id}) = {phi_val:.4f}")
+
+    sesion_id = input("sesion_id (ej. 2025-11-26_sesion-001): ").strip()
+    campo_id = input("campo_id (ej. S01): ").strip() or "S01"
+    tipo = input("tipo de fruto (ej. texto, visual): ").strip() or "texto"
+
+    yaml_data = audit_fruto(cfg, path, artefact_id, sesion_id, campo_id, tipo)
 
     print(f"\nArchivo auditado y actualizado: {path}")
-    print(f"hash10 (cuerpo): {hash10}")
+    print(f"hash10 (cuerpo): {yaml_data['hash10']}")
 
 
 def main():
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# scripts/clacs_batch.py
+from __future__ import annotations
+from pathlib import Path
+from typing import List, Dict, Optional, Set, Callable
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+import argparse
+import json
+import sys
+import threading
+import time
+
+from clacs_core import (
+    Field,
+    ProjectConfig,
+    load_project_config,
+    save_project_config,
+    build_artefact_index,
+    compute_field_vector,
+    compute_phi,
+    load_registro_overlay,
+    apply_registro_overlay,
+    iter_registro,
+    update_phi_index,
+    insert_phi_entry,
+    read_registro_entries_above,
+)
+from clacs_hilbert_cli import build_artefact
+from clacs_audit_artifact import audit_fruto
+from clacs_seal_register import build_registro_entry, append_to_registro
+
+
+# -----------------------------
+# Modelo del lote
+# -----------------------------
+
+@dataclass
+class Step:
+    id: str
+    op: str
+    args: Dict[str, object]
+    depends_on: Set[str] = field(default_factory=set)
+    status: str = "pendiente"      # pendiente | ok | error | omitido
+    seconds: float = 0.0
+    result: object = None
+    error: Optional[str] = None
+
+
+class BatchSession:
+    """
+    Estado compartido entre pasos: proyecto cargado una sola vez, índice de
+    artefactos, overlay del registro e índice Φ. El índice Φ se carga del
+    disco en la primera consulta y después se actualiza en memoria con cada
+    sello; el lock serializa los appends al registro y el acceso al índice.
+    """
+
+    def __init__(self, cfg: ProjectConfig):
+        self.cfg = cfg
+        self.index = build_artefact_index(cfg)
+        self.project_dirty = False
+        self._overlay = None
+        self._phi_index = None
+        self._registro_lock = threading.Lock()
+
+    def overlay(self):
+        if self._overlay is None:
+            self._overlay = load_registro_overlay()
+        return self._overlay
+
+    def _phi_index_locked(self):
+        if self._phi_index is None:
+            self._phi_index = update_phi_index()
+        return self._phi_index
+
+    # --- operaciones ---
+
+    def add_artefact(self, args: Dict[str, object]) -> Dict[str, object]:
+        art_id = str(args.get("id", "")).strip()
+        if art_id in self.index:
+            raise ValueError(f"Ya existe un artefacto con id '{art_id}'.")
+        art = build_artefact(
+            self.cfg,
+            art_id,
+            dict(args.get("scores", {})),
+            name=str(args.get("name", "")),
+            kind=str(args.get("kind", "arte")),
+            raw_path=str(args.get("raw_path", "")),
+            notes=str(args.get("notes", "")),
+        )
+        self.cfg.artefacts.append(art)
+        self.index[art.id] = art
+        self.project_dirty = True
+        return {"id": art.id, "vector": art.vector}
+
+    def define_field(self, args: Dict[str, object]) -> Dict[str, object]:
+        prototype_ids = [str(p) for p in args.get("prototype_ids", [])]
+        vector = compute_field_vector(self.cfg, prototype_ids, index=self.index)
+        self.cfg.field = Field(prototype_ids=prototype_ids, vector=vector)
+        self.project_dirty = True
+        return {"prototype_ids": prototype_ids, "vector": vector}
+
+    def score(self, args: Dict[str, object]) -> Dict[str, float]:
+        ids = args.get("ids") or [args["id"]]
+        return {str(i): compute_phi(self.cfg, str(i), index=self.index) for i in ids}
+
+    def audit(self, args: Dict[str, object]) -> Dict[str, object]:
+        yaml_data = audit_fruto(
+            self.cfg,
+            Path(str(args["path"])),
+            str(args.get("id", "")),
+            str(args.get("sesion_id", "")),
+            campo_id=str(args.get("campo_id", "S01")),
+            tipo=str(args.get("tipo", "texto")),
+            index=self.index,
+        )
+        return {"phi_clacs": yaml_data["phi_clacs"], "hash10": yaml_data["hash10"]}
+
+    def seal(self, args: Dict[str, object]) -> Dict[str, object]:
+        entry = build_registro_entry(self.cfg, Path(str(args["path"])), index=self.index)
+        with self._registro_lock:
+            offset = append_to_registro(entry)
+            if self._phi_index is not None:
+                phis, offsets = self._phi_index
+                insert_phi_entry(phis, offsets, float(entry["phi_clacs"]), offset)
+        return entry
+
+    def query(self, args: Dict[str, object]) -> Dict[str, object]:
+        overlay = self.overlay()
+        filters = {k: args[k] for k in ("campo_id", "sesion_id", "testigo_id", "artefact_id") if k in args}
+        limit = int(args.get("limite", 50))
+        if "phi_min" in args:
+            with self._registro_lock:
+                phis, offsets = self._phi_index_locked()
+                above = read_registro_entries_above(phis, offsets, float(args["phi_min"]))
+            source = (apply_registro_overlay(e, overlay) for e in above)
+        else:
+            source = iter_registro(overlay=overlay)
+        matches: List[Dict[str, object]] = []
+        total = 0
+        for entry in source:
+            if all(entry.get(k) == v for k, v in filters.items()):
+                total += 1
+                if len(matches) < limit:
+                    matches.append(entry)
+        return {"total": total, "entradas": matches}
+
+
+# Recursos que lee / escribe / amplía cada operación; sirven para deducir el orden.
+# Las ampliaciones (append al registro) conmutan entre sí y no se encadenan.
+_RESOURCES: Dict[str, Callable[[Dict[str, object]], tuple]] = {
+    "add_artefact": lambda a: (set(), {"artefactos"}, set()),
+    "define_field": lambda a: ({"artefactos"}, {"campo"}, set()),
+    "score": lambda a: ({"artefactos", "campo"}, set(), set()),
+    "audit": lambda a: ({"artefactos", "campo"}, {_fruto_resource(a)}, set()),
+    "seal": lambda a: ({"artefactos", "campo", _fruto_resource(a)}, set(), {"registro"}),
+    "query": lambda a: ({"registro"}, set(), set()),
+}
+
+# Argumentos obligatorios por operación; cada tupla es un "uno de".
+_REQUIRED_ARGS: Dict[str, List[tuple]] = {
+    "add_artefact": [("id",), ("scores",)],
+    "define_field": [("prototype_ids",)],
+    "score": [("id", "ids")],
+    "audit": [("path",), ("id",), ("sesion_id",)],
+    "seal": [("path",)],
+    "query": [],
+}
+
+
+def _fruto_resource(args: Dict[str, object]) -> str:
+    # Misma clave para "frutos/f1.md" y "./frutos/f1.md"
+    return f"fruto:{Path(str(args['path'])).resolve()}"
+
+
+def _check_args(step_id: str, op: str, args: Dict[str, object]) -> None:
+    for options in _REQUIRED_ARGS[op]:
+        if not any(args.get(k) not in (None, "", []) for k in options):
+            names = " o ".join(f"'{k}'" for k in options)
+            raise ValueError(f"Paso '{step_id}' ({op}) necesita el argumento {names}.")
+    for key in ("ids", "prototype_ids"):
+        if key in args and not isinstance(args[key], list):
+            raise ValueError(f"Paso '{step_id}' ({op}): '{key}' debe ser una lista de IDs.")
+    if "scores" in args:
+        scores = args["scores"]
+        if not isinstance(scores, dict) or any(
+            isinstance(v, bool) or not isinstance(v, int) for v in scores.values()
+        ):
+            raise ValueError(
+                f"Paso '{step_id}' ({op}): 'scores' debe ser un objeto {{dimensión: entero}}."
+            )
+
+
+def load_batch(path: Path) -> List[Step]:
+    """
+    Lee un lote JSON: {"pasos": [{"id", "op", "args", "depende_de"?}, ...]}.
+
+    Además de las dependencias explícitas, cada paso espera al último paso
+    anterior que escribió un recurso que usa, los lectores esperan a las
+    ampliaciones previas, y quien escribe o amplía espera a los lectores previos.
+    """
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    steps: List[Step] = []
+    last_writer: Dict[str, str] = {}
+    readers: Dict[str, List[str]] = {}
+    appenders: Dict[str, List[str]] = {}
+    seen: Set[str] = set()
+    for i, raw in enumerate(data.get("pasos", []), start=1):
+        op = str(raw.get("op", ""))
+        if op not in _RESOURCES:
+            raise ValueError(f"Operación desconocida en paso {i}: '{op}'.")
+        step_id = str(raw.get("id") or f"paso{i:03d}")
+        if step_id in seen:
+            raise ValueError(f"ID de paso repetido: '{step_id}'.")
+        args = dict(raw.get("args", {}))
+        deps = {str(d) for d in raw.get("depende_de", [])}
+        unknown = deps - seen
+        if unknown:
+            raise ValueError(f"Paso '{step_id}' depende de pasos no definidos antes: {', '.join(sorted(unknown))}")
+        _check_args(step_id, op, args)
+        reads, writes, appends = _RESOURCES[op](args)
+        for res in reads | writes | appends:
+            if res in last_writer:
+                deps.add(last_writer[res])
+        for res in reads | writes:
+            deps.update(appenders.get(res, []))
+        for res in writes:
+            deps.update(readers.pop(res, []))
+            appenders.pop(res, None)
+            last_writer[res] = step_id
+        for res in appends:
+            deps.update(readers.get(res, []))
+            appenders.setdefault(res, []).append(step_id)
+        for res in reads:
+            readers.setdefault(res, []).append(step_id)
+        seen.add(step_id)
+        steps.append(Step(id=step_id, op=op, args=args, depends_on=deps))
+    return steps
+
+
+# -----------------------------
+# Ejecución
+# -----------------------------
+
+def _run_step(session: BatchSession, step: Step) -> None:
+    start = time.perf_counter()
+    try:
+        step.result = getattr(session, step.op)(step.args)
+        step.status = "ok"
+    except Exception as e:
+        step.status = "error"
+        step.error = str(e)
+    step.seconds = time.perf_counter() - start
+
+
+def run_batch(session: BatchSession, steps: List[Step], workers: int = 4) -> None:
+    """
+    Ejecuta los pasos en cuanto sus dependencias terminan; los independientes
+    corren en paralelo. Si un paso falla, sus dependientes se omiten.
+    """
+    by_id = {s.id: s for s in steps}
+    pending = list(steps)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while pending or running:
+            still_pending = []
+            for step in pending:
+                dep_status = [by_id[d].status for d in step.depends_on]
+                if any(st in ("error", "omitido") for st in dep_status):
+                    step.status = "omitido"
+                    step.error = "dependencia fallida"
+                elif all(st == "ok" for st in dep_status):
+                    running[pool.submit(_run_step, session, step)] = step
+                else:
+                    still_pending.append(step)
+            pending = still_pending
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                running.pop(fut)
+
+
+def print_report(steps: List[Step], total: float) -> None:
+    print("\n=== Lote CLACS ===")
+    for s in steps:
+        line = f"  [{s.status:>8}] {s.id:<16} {s.op:<13} {s.seconds * 1000:8.1f} ms"
+        if s.error:
+            line += f"  · {s.error}"
+        print(line)
+    ok = sum(1 for s in steps if s.status == "ok")
+    print(f"\n{ok}/{len(steps)} pasos correctos en {total:.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ejecuta un lote JSON de operaciones CLACS en un solo proceso."
+    )
+    parser.add_argument("lote", type=Path, help="archivo JSON con la lista de pasos")
+    parser.add_argument("--hilos", type=int, default=4, help="pasos independientes en paralelo")
+    parser.add_argument("--salida", type=Path, default=None,
+                        help="escribe resultados y tiempos por paso en este JSON")
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        steps = load_batch(args.lote)
+        session = BatchSession(load_project_config())
+        run_batch(session, steps, workers=args.hilos)
+        if session.project_dirty:
+            save_project_config(session.cfg)
+        total = time.perf_counter() - start
+    except Exception as e:
+        print(f"Error durante el lote: {e}")
+        sys.exit(1)
+
+    print_report(steps, total)
+    if args.salida is not None:
+        with args.salida.open("w", encoding="utf-8") as f:
+            json.dump(
+                [{"id": s.id, "op": s.op, "status": s.status, "segundos": round(s.seconds, 6),
+                  "resultado": s.result, "error": s.error} for s in steps],
+                f, ensure_ascii=False, indent=2,
+            )
+    if any(s.status != "ok" for s in steps):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
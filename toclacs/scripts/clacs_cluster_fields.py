@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# scripts/clacs_cluster_fields.py
+from __future__ import annotations
+from pathlib import Path
+from typing import List, Dict, Tuple, Iterator, Optional
+from itertools import islice
+from operator import mul
+import argparse
+import heapq
+import json
+import math
+import random
+import sys
+
+from clacs_core import (
+    REGISTRO_DIR,
+    VECTORES_PATH,
+    load_project_config,
+    write_vector_store,
+    vector_store_is_stale,
+    read_vector_store_dimensions,
+    iter_vector_store,
+)
+
+
+CANDIDATOS_PATH = REGISTRO_DIR / "campos_candidatos.json"
+
+
+# -----------------------------
+# Helpers vectoriales
+# -----------------------------
+
+def _dot(a: List[float], b: List[float]) -> float:
+    return sum(map(mul, a, b))
+
+
+def _normalize_or_none(v: List[float]) -> Optional[List[float]]:
+    norm = math.sqrt(_dot(v, v))
+    if norm == 0:
+        return None
+    return [c / norm for c in v]
+
+
+def _batches(path: Path, batch_size: int) -> Iterator[List[Tuple[str, List[float]]]]:
+    it = iter_vector_store(path)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _assign(vec: List[float], centroids: List[List[float]]) -> Tuple[int, float]:
+    best_j, best_dot = 0, -2.0
+    for j, c in enumerate(centroids):
+        d = _dot(vec, c)
+        if d > best_dot:
+            best_j, best_dot = j, d
+    return best_j, best_dot
+
+
+# -----------------------------
+# k-means esférico mini-batch
+# -----------------------------
+
+_RESERVOIR_PER_CLUSTER = 32
+_RESERVOIR_MIN = 1024
+_SAME_DIRECTION = 1.0 - 1e-9
+
+
+def _is_known(vec: List[float], centroids: List[List[float]]) -> bool:
+    return any(_dot(vec, c) >= _SAME_DIRECTION for c in centroids)
+
+
+def _cos_dist(vec: List[float], centroid: List[float]) -> float:
+    # Redondeo a 0 para que una dirección ya elegida no vuelva a ser candidata
+    d = 1.0 - _dot(vec, centroid)
+    return 0.0 if d <= 1.0 - _SAME_DIRECTION else d
+
+
+def _init_centroids(path: Path, k: int, seed: int) -> List[List[float]]:
+    """
+    Muestreo de reservorio determinista seguido de k-means++ sobre la muestra,
+    descartando direcciones repetidas. Devuelve menos de k centroides si la
+    muestra no contiene k direcciones distintas.
+    """
+    rng = random.Random(seed)
+    size = max(_RESERVOIR_MIN, _RESERVOIR_PER_CLUSTER * k)
+    reservoir: List[List[float]] = []
+    for i, (_, vec) in enumerate(iter_vector_store(path)):
+        if i < size:
+            reservoir.append(list(vec))
+        else:
+            j = rng.randint(0, i)
+            if j < size:
+                reservoir[j] = list(vec)
+
+    distinct: List[List[float]] = []
+    seen = set()
+    for vec in reservoir:
+        key = tuple(round(x, 9) for x in vec)
+        if key not in seen:
+            seen.add(key)
+            distinct.append(vec)
+    if not distinct:
+        return []
+
+    centroids = [distinct[rng.randrange(len(distinct))]]
+    # distancia coseno al centroide más cercano
+    dist = [_cos_dist(v, centroids[0]) for v in distinct]
+    while len(centroids) < k:
+        total = sum(d for d in dist if d > 0)
+        if total <= 0:
+            break
+        r = rng.random() * total
+        pick = 0
+        for i, d in enumerate(dist):
+            if d <= 0:
+                continue
+            r -= d
+            pick = i
+            if r <= 0:
+                break
+        chosen = distinct[pick]
+        centroids.append(chosen)
+        dist = [min(d, _cos_dist(v, chosen)) for d, v in zip(dist, distinct)]
+    return centroids
+
+
+def cluster_vectors(
+    path: Path,
+    k: int,
+    seed: int = 0,
+    batch_size: int = 4096,
+    max_passes: int = 10,
+    tol: float = 1e-6,
+    top_n: int = 5,
+) -> Tuple[List[Dict[str, object]], List[str]]:
+    """
+    Agrupa los vectores del almacén en k clústeres sobre la esfera unidad.
+
+    Cada pasada recorre el almacén por lotes; tras cada lote el centroide j se
+    actualiza como normalize(N_j * c_j + Σ_lote x), donde N_j acumula todo lo
+    asignado desde el inicio (o desde su última resiembra), de modo que cada
+    pasada refina los centroides en lugar de reiniciarlos. Un centroide que
+    termina una pasada vacío se resiembra con el vector peor ajustado.
+    La memoria es O(k · (dim + top_n)), independiente del número de artefactos.
+
+    Devuelve (clústeres, avisos).
+    """
+    if k <= 0:
+        raise ValueError("k debe ser un entero positivo.")
+    if batch_size <= 0:
+        raise ValueError("El tamaño de lote debe ser un entero positivo.")
+    if max_passes <= 0:
+        raise ValueError("El número de pasadas debe ser un entero positivo.")
+    if top_n <= 0:
+        raise ValueError("El número de prototipos por campo debe ser un entero positivo.")
+    centroids = _init_centroids(path, k, seed)
+    if not centroids:
+        raise ValueError(f"El almacén de vectores {path} está vacío.")
+    avisos: List[str] = []
+    if len(centroids) < k:
+        avisos.append(
+            f"Se pidieron {k} campos pero solo hay {len(centroids)} direcciones distintas "
+            "en la muestra; se proponen menos campos."
+        )
+    k = len(centroids)
+    dim = len(centroids[0])
+
+    counts = [0] * k
+    for _ in range(max_passes):
+        previous = [list(c) for c in centroids]
+        pass_counts = [0] * k
+        # vectores peor ajustados (menor coseno con su centroide), para resembrar
+        worst: List[Tuple[float, int, List[float]]] = []
+        seq = 0
+        for batch in _batches(path, batch_size):
+            sums = [[0.0] * dim for _ in range(k)]
+            batch_counts = [0] * k
+            for art_id, vec in batch:
+                if len(vec) != dim:
+                    raise ValueError(f"Dimensiones inconsistentes en artefacto '{art_id}'.")
+                j, d = _assign(vec, centroids)
+                batch_counts[j] += 1
+                s = sums[j]
+                for i, x in enumerate(vec):
+                    s[i] += x
+                seq += 1
+                if len(worst) < k:
+                    heapq.heappush(worst, (-d, seq, vec))
+                elif d < -worst[0][0]:
+                    heapq.heapreplace(worst, (-d, seq, vec))
+            for j in range(k):
+                if batch_counts[j] == 0:
+                    continue
+                n_old = counts[j]
+                merged = [n_old * c + s for c, s in zip(centroids[j], sums[j])]
+                updated = _normalize_or_none(merged)
+                if updated is not None:
+                    centroids[j] = updated
+                counts[j] = n_old + batch_counts[j]
+                pass_counts[j] += batch_counts[j]
+
+        reseeded = False
+        candidates = [vec for _, _, vec in sorted(worst, key=lambda t: (-t[0], t[1]))]
+        for j in range(k):
+            if pass_counts[j] > 0:
+                continue
+            others = centroids[:j] + centroids[j + 1:]
+            while candidates:
+                vec = candidates.pop(0)
+                if not _is_known(vec, others):
+                    centroids[j] = list(vec)
+                    counts[j] = 0
+                    reseeded = True
+                    break
+        shift = max(1.0 - _dot(c, p) for c, p in zip(centroids, previous))
+        if shift <= tol and not reseeded:
+            break
+
+    # Pasada final: tamaño, cohesión (Φ medio respecto al centroide) y prototipos
+    sizes = [0] * k
+    phi_sums = [0.0] * k
+    heaps: List[List[Tuple[float, str]]] = [[] for _ in range(k)]
+    for batch in _batches(path, batch_size):
+        for art_id, vec in batch:
+            j, d = _assign(vec, centroids)
+            sizes[j] += 1
+            amplitude = max(0.0, d)
+            phi_sums[j] += amplitude * amplitude
+            h = heaps[j]
+            if len(h) < top_n:
+                heapq.heappush(h, (d, art_id))
+            elif d > h[0][0]:
+                heapq.heapreplace(h, (d, art_id))
+
+    clusters: List[Dict[str, object]] = []
+    empty = 0
+    for j in range(k):
+        if sizes[j] == 0:
+            empty += 1
+            continue
+        central = sorted(heaps[j], key=lambda t: (-t[0], t[1]))
+        clusters.append({
+            "vector": [round(c, 6) for c in centroids[j]],
+            "prototipos": [art_id for _, art_id in central],
+            "cohesion": round(phi_sums[j] / sizes[j], 4),
+            "tamano": sizes[j],
+        })
+    if empty:
+        avisos.append(
+            f"{empty} centroide(s) quedaron sin artefactos tras resembrar; "
+            f"se proponen {len(clusters)} campos en lugar de {k}."
+        )
+    clusters.sort(key=lambda c: (-c["cohesion"], -c["tamano"]))
+    return [{"campo_id": f"C{idx:02d}", **c} for idx, c in enumerate(clusters, start=1)], avisos
+
+
+# -----------------------------
+# Salida
+# -----------------------------
+
+def print_report(
+    clusters: List[Dict[str, object]],
+    dim_order: List[str],
+    avisos: Optional[List[str]] = None,
+) -> None:
+    print(f"\n=== Campos candidatos ({len(clusters)}) ===")
+    for aviso in avisos or []:
+        print(f"Aviso: {aviso}")
+    for c in clusters:
+        print(f"\n{c['campo_id']} · {c['tamano']} artefactos · cohesión Φ = {c['cohesion']:.4f}")
+        names = dim_order or [str(i) for i in range(len(c["vector"]))]
+        coords = " ".join(f"{name}={x:.4f}" for name, x in zip(names, c["vector"]))
+        print(f"  Φ_S = {coords}")
+        print("  Prototipos sugeridos:", ", ".join(c["prototipos"]))
+
+
+def save_candidates(clusters: List[Dict[str, object]], path: Path = CANDIDATOS_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(clusters, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Propone campos CLACS candidatos agrupando los vectores de artefactos."
+    )
+    parser.add_argument("k", type=int, help="número de campos candidatos")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--lote", type=int, default=4096, help="tamaño del mini-batch")
+    parser.add_argument("--pasadas", type=int, default=10, help="máximo de pasadas")
+    parser.add_argument("--prototipos", type=int, default=5, help="prototipos por campo")
+    parser.add_argument("--vectores", type=Path, default=VECTORES_PATH,
+                        help="almacén JSONL de vectores (se regenera desde el proyecto si está desactualizado)")
+    parser.add_argument("--guardar", action="store_true",
+                        help=f"escribe los candidatos en {CANDIDATOS_PATH}")
+    args = parser.parse_args()
+
+    try:
+        if args.vectores == VECTORES_PATH and vector_store_is_stale(args.vectores):
+            n = write_vector_store(load_project_config(), args.vectores)
+            print(f"Almacén de vectores regenerado ({n} artefactos): {args.vectores}")
+        clusters, avisos = cluster_vectors(
+            args.vectores,
+            k=args.k,
+            seed=args.semilla,
+            batch_size=args.lote,
+            max_passes=args.pasadas,
+            top_n=args.prototipos,
+        )
+        print_report(clusters, read_vector_store_dimensions(args.vectores), avisos)
+        if args.guardar:
+            save_candidates(clusters)
+            print(f"\nCandidatos guardados en {CANDIDATOS_PATH}.")
+    except Exception as e:
+        print(f"Error durante el agrupamiento: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
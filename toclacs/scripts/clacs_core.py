@@ -3,10 +3,14 @@
 from __future__ import annotations
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Iterator, Set
+from array import array
+from bisect import bisect_right
+from heapq import merge
 import json
 import math
 import hashlib
+import struct
 
 # --------------------------------
 # Rutas base
@@ -14,6 +18,10 @@ import hashlib
 
 REGISTRO_DIR = Path("registro")
 PROJECT_PATH = REGISTRO_DIR / "clacs_project.json"
+VECTORES_PATH = REGISTRO_DIR / "clacs_vectores.jsonl"
+REGISTRO_PATH = REGISTRO_DIR / "clacs_registro.jsonl"
+OVERLAY_PATH = REGISTRO_DIR / "clacs_registro_overlay.jsonl"
+PHI_INDEX_PATH = REGISTRO_DIR / "clacs_phi_index.bin"
 
 
 # --------------------------------
@@ -131,14 +139,35 @@ def compute_artefact_vector(
     return normalize_vector(coords)
 
 
-def compute_field_vector(cfg: ProjectConfig, prototype_ids: List[str]) -> List[float]:
+def build_artefact_index(cfg: ProjectConfig) -> Dict[str, Artefact]:
+    """
+    Índice id -> Artefact para búsquedas repetidas sin recorrer la lista.
+    """
+    return {a.id: a for a in cfg.artefacts}
+
+
+def _find_artefact(
+    cfg: ProjectConfig,
+    artefact_id: str,
+    index: Optional[Dict[str, Artefact]],
+) -> Optional[Artefact]:
+    if index is not None:
+        return index.get(artefact_id)
+    return next((a for a in cfg.artefacts if a.id == artefact_id), None)
+
+
+def compute_field_vector(
+    cfg: ProjectConfig,
+    prototype_ids: List[str],
+    index: Optional[Dict[str, Artefact]] = None,
+) -> List[float]:
     """
     Calcula vector de campo Φ_S como suma normalizada de vectores de prototipos.
     """
     dim_order = [d.name for d in cfg.dimensions]
     vectors: List[List[float]] = []
     for pid in prototype_ids:
-        art = next((a for a in cfg.artefacts if a.id == pid), None)
+        art = _find_artefact(cfg, pid, index)
         if art is None:
             raise ValueError(f"Artefacto prototipo '{pid}' no encontrado.")
         if len(art.vector) != len(dim_order):
@@ -153,14 +182,18 @@ def compute_field_vector(cfg: ProjectConfig, prototype_ids: List[str]) -> List[f
     return normalize_vector(summed)
 
 
-def compute_phi(cfg: ProjectConfig, artefact_id: str) -> float:
+def compute_phi(
+    cfg: ProjectConfig,
+    artefact_id: str,
+    index: Optional[Dict[str, Artefact]] = None,
+) -> float:
     """
     Calcula Φ_CLACS(e | campo actual) = max(0, dot(v_e, Φ_S))^2, redondeado a 4 decimales.
     """
     if cfg.field is None:
         raise ValueError("El campo aún no ha sido definido en clacs_project.json.")
 
-    art = next((a for a in cfg.artefacts if a.id == artefact_id), None)
+    art = _find_artefact(cfg, artefact_id, index)
     if art is None:
         raise ValueError(f"Artefacto '{artefact_id}' no encontrado en clacs_project.json.")
 
@@ -173,6 +206,344 @@ def compute_phi(cfg: ProjectConfig, artefact_id: str) -> float:
     return round(phi, 4)
 
 
+# --------------------------------
+# Almacén de vectores (JSONL, lectura en streaming)
+# --------------------------------
+
+def write_vector_store(cfg: ProjectConfig, path: Path = VECTORES_PATH) -> int:
+    """
+    Vuelca los vectores normalizados de los artefactos en un JSONL.
+    La primera línea es una cabecera {"dimensiones": [...]}; el resto,
+    una línea por artefacto {"id": ..., "vector": [...]}.
+    Devuelve cuántos artefactos se escribieron.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with path.open("w", encoding="utf-8") as f:
+        header = {"dimensiones": [d.name for d in cfg.dimensions]}
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for a in cfg.artefacts:
+            f.write(json.dumps({"id": a.id, "vector": a.vector}, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+
+def vector_store_is_stale(path: Path = VECTORES_PATH) -> bool:
+    """
+    True si el almacén no existe o es más antiguo que clacs_project.json.
+    """
+    if not path.exists():
+        return True
+    if not PROJECT_PATH.exists():
+        return False
+    return path.stat().st_mtime < PROJECT_PATH.stat().st_mtime
+
+
+def read_vector_store_dimensions(path: Path = VECTORES_PATH) -> List[str]:
+    """
+    Lee solo la cabecera del almacén (orden de dimensiones).
+    """
+    with path.open("r", encoding="utf-8") as f:
+        first = f.readline().strip()
+    if not first:
+        return []
+    return list(json.loads(first).get("dimensiones", []))
+
+
+def iter_vector_store(path: Path = VECTORES_PATH) -> Iterator[Tuple[str, List[float]]]:
+    """
+    Recorre el almacén línea a línea devolviendo (id, vector) sin cargarlo entero.
+    """
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rec = json.loads(line)
+            if "id" not in rec:
+                continue  # cabecera
+            yield str(rec["id"]), rec["vector"]
+
+
+# --------------------------------
+# Registro: índice Φ y overlay
+# --------------------------------
+
+# magic, bytes del registro cubiertos, nº de entradas, inode, mtime_ns,
+# SHA256 del inicio y del final de la zona cubierta
+_INDEX_HEADER = struct.Struct("<8sqqqq32s32s")
+_INDEX_MAGIC = b"CLPHI\x00\x02\x00"
+_INDEX_FINGERPRINT_BYTES = 4096
+_INDEX_INSERT_MAX = 1024
+
+
+def registro_key(entry: Dict[str, object]) -> Tuple[str, str]:
+    """
+    Clave estable de una entrada del registro: (artefact_id, hash10).
+    """
+    return str(entry.get("artefact_id")), str(entry.get("hash10"))
+
+
+def load_registro_overlay(path: Path = OVERLAY_PATH) -> Dict[Tuple[str, str], Dict[str, object]]:
+    """
+    Lee el overlay del registro: cambios posteriores al sellado (p.ej. testigo_id)
+    sin reescribir clacs_registro.jsonl. Las líneas posteriores prevalecen.
+    """
+    overlay: Dict[Tuple[str, str], Dict[str, object]] = {}
+    if not path.exists():
+        return overlay
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rec = json.loads(line)
+            overlay.setdefault(registro_key(rec), {}).update(rec)
+    return overlay
+
+
+def append_registro_overlay(updates: List[Dict[str, object]], path: Path = OVERLAY_PATH) -> None:
+    """
+    Añade en bloque líneas al overlay. Cada una debe incluir artefact_id y hash10.
+    """
+    if not updates:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(u, ensure_ascii=False) + "\n" for u in updates))
+
+
+def apply_registro_overlay(
+    entry: Dict[str, object],
+    overlay: Dict[Tuple[str, str], Dict[str, object]],
+) -> Dict[str, object]:
+    patch = overlay.get(registro_key(entry))
+    if patch:
+        entry = {**entry, **patch}
+    return entry
+
+
+def iter_registro(
+    registro_path: Path = REGISTRO_PATH,
+    overlay: Optional[Dict[Tuple[str, str], Dict[str, object]]] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Recorre el registro línea a línea aplicando el overlay si se proporciona.
+    """
+    if not registro_path.exists():
+        return
+    with registro_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            yield apply_registro_overlay(entry, overlay) if overlay else entry
+
+
+def iter_registro_with_offsets(
+    registro_path: Path = REGISTRO_PATH,
+) -> Iterator[Tuple[int, Dict[str, object]]]:
+    """
+    Recorre el registro devolviendo (offset en bytes, entrada) por línea completa.
+    """
+    if not registro_path.exists():
+        return
+    with registro_path.open("rb") as f:
+        offset = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                yield offset, json.loads(line)
+            offset += len(line)
+
+
+def registro_identity(registro_path: Path = REGISTRO_PATH) -> Tuple[int, bytes]:
+    """
+    (inode, SHA256 de los primeros bytes) del registro: cambia si se reescribe,
+    no si solo se le añaden líneas al final.
+    """
+    if not registro_path.exists():
+        return 0, b"\x00" * 32
+    st = registro_path.stat()
+    head, _ = _registro_fingerprint(
+        registro_path, min(st.st_size, _INDEX_FINGERPRINT_BYTES)
+    )
+    return st.st_ino, head
+
+
+def _scan_registro(registro_path: Path, start: int) -> Tuple[List[Tuple[float, int]], int]:
+    """
+    Lee las líneas completas desde `start`. Una última línea sin salto final
+    (escritura a medias) no se indexa ni cuenta en el offset devuelto.
+    """
+    pairs: List[Tuple[float, int]] = []
+    with registro_path.open("rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                entry = json.loads(line)
+                pairs.append((float(entry.get("phi_clacs", 0.0)), offset))
+            offset += len(line)
+    return pairs, offset
+
+
+def insert_phi_entry(phis: array, offsets: array, phi: float, offset: int) -> None:
+    """
+    Inserta in situ una línea recién añadida al registro en el índice Φ.
+    Como su offset es mayor que los existentes, bisect_right conserva el
+    orden por (phi, offset).
+    """
+    i = bisect_right(phis, phi)
+    phis.insert(i, phi)
+    offsets.insert(i, offset)
+
+
+def _registro_fingerprint(registro_path: Path, covered: int) -> Tuple[bytes, bytes]:
+    """
+    SHA256 de los primeros y de los últimos bytes de la zona ya indexada.
+    """
+    window = _INDEX_FINGERPRINT_BYTES
+    with registro_path.open("rb") as f:
+        head = hashlib.sha256(f.read(min(window, covered))).digest()
+        tail_start = max(0, covered - window)
+        f.seek(tail_start)
+        tail = hashlib.sha256(f.read(covered - tail_start)).digest()
+    return head, tail
+
+
+def _load_phi_index(index_path: Path) -> Optional[Tuple[tuple, array, array]]:
+    if not index_path.exists():
+        return None
+    with index_path.open("rb") as f:
+        raw = f.read(_INDEX_HEADER.size)
+        if len(raw) != _INDEX_HEADER.size:
+            return None
+        header = _INDEX_HEADER.unpack(raw)
+        if header[0] != _INDEX_MAGIC:
+            return None
+        n = header[2]
+        phis, offsets = array("d"), array("q")
+        try:
+            phis.fromfile(f, n)
+            offsets.fromfile(f, n)
+        except EOFError:
+            return None
+    return header, phis, offsets
+
+
+def update_phi_index(
+    registro_path: Path = REGISTRO_PATH,
+    index_path: Path = PHI_INDEX_PATH,
+) -> Tuple[array, array]:
+    """
+    Devuelve el índice Φ del registro como dos arrays paralelos
+    (phi ascendente, offset en bytes de la línea).
+
+    El registro es append-only: solo se leen las líneas añadidas desde la
+    última actualización y se mezclan con el índice existente. El índice
+    guarda una huella del registro (inode, mtime y SHA256 del inicio y del
+    final de la zona indexada); si no coincide, se reconstruye completo.
+    """
+    phis, offsets = array("d"), array("q")
+    if not registro_path.exists():
+        return phis, offsets
+
+    st = registro_path.stat()
+    covered = 0
+    loaded = _load_phi_index(index_path)
+    if loaded is not None:
+        (_, old_covered, _, inode, mtime_ns, head, tail), old_phis, old_offsets = loaded
+        if old_covered == st.st_size and st.st_ino == inode and st.st_mtime_ns == mtime_ns:
+            return old_phis, old_offsets
+        if (
+            st.st_ino == inode
+            and old_covered < st.st_size
+            and _registro_fingerprint(registro_path, old_covered) == (head, tail)
+        ):
+            covered, phis, offsets = old_covered, old_phis, old_offsets
+
+    new_pairs, covered = _scan_registro(registro_path, covered)
+    new_pairs.sort()
+    if len(new_pairs) <= _INDEX_INSERT_MAX:
+        for p, o in new_pairs:
+            insert_phi_entry(phis, offsets, p, o)
+    else:
+        merged = list(merge(zip(phis, offsets), new_pairs))
+        phis = array("d", (p for p, _ in merged))
+        offsets = array("q", (o for _, o in merged))
+
+    head, tail = _registro_fingerprint(registro_path, covered)
+    # Si quedó una línea a medias, el mtime no sirve como atajo la próxima vez.
+    mtime_ns = st.st_mtime_ns if covered == st.st_size else -1
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with index_path.open("wb") as f:
+        f.write(_INDEX_HEADER.pack(
+            _INDEX_MAGIC, covered, len(phis), st.st_ino, mtime_ns, head, tail,
+        ))
+        phis.tofile(f)
+        offsets.tofile(f)
+    return phis, offsets
+
+
+def registro_entries_above(
+    threshold: float,
+    registro_path: Path = REGISTRO_PATH,
+    index_path: Path = PHI_INDEX_PATH,
+) -> List[Dict[str, object]]:
+    """
+    Entradas del registro con phi_clacs > threshold (Φ descendente), leídas
+    por offset a partir del índice, sin recorrer todo el registro. Cada
+    entrada se vuelve a comprobar contra el umbral al leerla.
+    """
+    phis, offsets = update_phi_index(registro_path, index_path)
+    return read_registro_entries_above(phis, offsets, threshold, registro_path)
+
+
+def read_registro_entries_above(
+    phis: array,
+    offsets: array,
+    threshold: float,
+    registro_path: Path = REGISTRO_PATH,
+) -> List[Dict[str, object]]:
+    """
+    Como registro_entries_above, pero con un índice ya cargado en memoria.
+    """
+    return [e for _, e in iter_registro_above(phis, offsets, threshold, registro_path)]
+
+
+def iter_registro_above(
+    phis: array,
+    offsets: array,
+    threshold: float,
+    registro_path: Path = REGISTRO_PATH,
+    exclude_offsets: Optional[Set[int]] = None,
+) -> Iterator[Tuple[int, Dict[str, object]]]:
+    """
+    (offset, entrada) con phi_clacs > threshold en Φ descendente. Los offsets
+    de `exclude_offsets` se descartan antes de leer el registro.
+    """
+    start = bisect_right(phis, threshold)
+    if start == len(phis):
+        return
+    with registro_path.open("rb") as f:
+        for i in range(len(phis) - 1, start - 1, -1):
+            off = offsets[i]
+            if exclude_offsets and off in exclude_offsets:
+                continue
+            f.seek(off)
+            try:
+                entry = json.loads(f.readline())
+            except ValueError:
+                continue
+            if float(entry.get("phi_clacs", 0.0)) > threshold:
+                yield off, entry
+
+
 # --------------------------------
 # YAML front-matter (simple)
 # --------------------------------
@@ -95,6 +95,39 @@ def list_artefacts(cfg: ProjectConfig) -> None:
         print(f"  - id={a.id} | {a.name} [{a.kind}] | puntajes: {dims_str}")
 
 
+def build_artefact(
+    cfg: ProjectConfig,
+    art_id: str,
+    scores_raw: Dict[str, int],
+    name: str = "",
+    kind: str = "arte",
+    raw_path: str = "",
+    notes: str = "",
+) -> Artefact:
+    """
+    Construye un artefacto validando puntuaciones contra las dimensiones y la escala.
+    """
+    if not art_id:
+        raise ValueError("El ID del artefacto no puede estar vacío.")
+    for d in cfg.dimensions:
+        val = scores_raw.get(d.name)
+        if isinstance(val, bool) or not isinstance(val, int) or not (0 <= val <= cfg.scale_max):
+            raise ValueError(
+                f"Puntuación de '{d.name}' para '{art_id}' debe ser un entero entre 0 y {cfg.scale_max}."
+            )
+    dim_order = [d.name for d in cfg.dimensions]
+    vector = compute_artefact_vector(scores_raw, dim_order, cfg.scale_max)
+    return Artefact(
+        id=art_id,
+        name=name or art_id,
+        kind=kind,
+        raw_path=raw_path,
+        notes=notes,
+        scores_raw={k: scores_raw[k] for k in dim_order},
+        vector=vector,
+    )
+
+
 def add_artefact_interactive(cfg: ProjectConfig) -> None:
     print("\n=== Nuevo artefacto ===")
     art_id = input("ID corto para el artefacto (sin espacios, p.ej. 'e1'): ").strip()
@@ -120,22 +153,15 @@ def add_artefact_interactive(cfg: ProjectConfig) -> None:
             except ValueError:
                 print(f"    Ingresa un entero entre 0 y {cfg.scale_max}.")
 
-    dim_order = [d.name for d in cfg.dimensions]
-    vector = compute_artefact_vector(scores_raw, dim_order, cfg.scale_max)
-
-    art = Artefact(
-        id=art_id,
-        name=name or art_id,
-        kind=kind,
-        raw_path=raw_path,
-        notes=notes,
-        scores_raw=scores_raw,
-        vector=vector,
-    )
+    try:
+        art = build_artefact(cfg, art_id, scores_raw, name, kind, raw_path, notes)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
     cfg.artefacts.append(art)
 
     print(f"\nArtefacto '{art.id}' registrado con vector normalizado:")
-    print("  v =", " ".join(f"{x:.4f}" for x in vector))
+    print("  v =", " ".join(f"{x:.4f}" for x in art.vector))
 
 
 def define_field_interactive(cfg: ProjectConfig) -> None:
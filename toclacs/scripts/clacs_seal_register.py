@@ -4,10 +4,15 @@
 from __future__ import annotations
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Optional
 import json
 import sys
 
 from clacs_core import (
+    REGISTRO_DIR,
+    REGISTRO_PATH,
+    Artefact,
+    ProjectConfig,
     load_project_config,
     compute_phi,
     parse_yaml_front_matter,
@@ -15,18 +20,26 @@ from clacs_core import (
 )
 
 
-REGISTRO_DIR = Path("registro")
-REGISTRO_PATH = REGISTRO_DIR / "clacs_registro.jsonl"
-
-
-def append_to_registro(entry: dict) -> None:
+def append_to_registro(entry: dict) -> int:
+    """
+    Añade la entrada al registro y devuelve el offset en bytes de su línea.
+    """
     REGISTRO_DIR.mkdir(parents=True, exist_ok=True)
+    offset = REGISTRO_PATH.stat().st_size if REGISTRO_PATH.exists() else 0
     with REGISTRO_PATH.open("a", encoding="utf-8") as f:
         f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-
-
-def seal_file(path: Path) -> None:
-    cfg = load_project_config()
+    return offset
+
+
+def build_registro_entry(
+    cfg: ProjectConfig,
+    path: Path,
+    index: Optional[Dict[str, Artefact]] = None,
+) -> Dict[str, object]:
+    """
+    Verifica hash10 y Φ_CLACS de un fruto auditado y construye su entrada
+    para el registro (sin escribirla).
+    """
     if not path.exists():
         raise FileNotFoundError(f"Archivo no encontrado: {path}")
 
@@ -54,7 +67,7 @@ def seal_file(path: Path) -> None:
         )
 
     # Verificar Φ_CLACS (tolerancia pequeña)
-    computed_phi = compute_phi(cfg, artefact_id)
+    computed_phi = compute_phi(cfg, artefact_id, index=index)
     if abs(computed_phi - yaml_phi) > 1e-4:
         raise ValueError(
             f"Φ_CLACS inconsistente para artefacto {artefact_id}.\n"
@@ -86,7 +99,12 @@ def seal_file(path: Path) -> None:
         "es_testigo": es_testigo,
         "testigo_id": testigo_id,
     }
+    return entry
+
 
+def seal_file(path: Path) -> None:
+    cfg = load_project_config()
+    entry = build_registro_entry(cfg, path)
     append_to_registro(entry)
     print(f"\nFruto sellado en {REGISTRO_PATH}:")
     print(json.dumps(entry, ensure_ascii=False, indent=2))
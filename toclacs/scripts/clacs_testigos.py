@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# scripts/clacs_testigos.py
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Tuple, Optional
+import argparse
+import re
+import struct
+import sys
+
+from clacs_core import (
+    REGISTRO_DIR,
+    OVERLAY_PATH,
+    registro_key,
+    registro_identity,
+    load_registro_overlay,
+    append_registro_overlay,
+    update_phi_index,
+    iter_registro_above,
+    iter_registro_with_offsets,
+)
+
+
+TESTIGOS_DIR = Path("testigos")
+UMBRAL_TESTIGO = 0.95
+_TESTIGO_DIR_RE = re.compile(r"^([A-Z]\d{3})_")
+
+ASIGNADOS_PATH = REGISTRO_DIR / "clacs_testigos_asignados.bin"
+# magic, tamaño del overlay proyectado, inode y SHA256 inicial del registro
+_ASIGNADOS_HEADER = struct.Struct("<8sqq32s")
+_ASIGNADOS_MAGIC = b"CLASG\x00\x01\x00"
+_ASIGNADOS_RECORD = struct.Struct("<q8s")  # offset en el registro, testigo_id
+
+
+# -----------------------------
+# Testigos y candidatos
+# -----------------------------
+
+def list_testigos(base: Path = TESTIGOS_DIR) -> Dict[str, Path]:
+    """
+    Devuelve {testigo_id: carpeta} para las carpetas tipo W001_Nombre-Simbolico.
+    """
+    testigos: Dict[str, Path] = {}
+    if not base.exists():
+        return testigos
+    for d in sorted(base.iterdir()):
+        m = _TESTIGO_DIR_RE.match(d.name)
+        if d.is_dir() and m:
+            testigos[m.group(1)] = d
+    return testigos
+
+
+# -----------------------------
+# Asignaciones (proyección binaria del overlay)
+# -----------------------------
+
+def _read_asignados_header(path: Path) -> Optional[tuple]:
+    if not path.exists():
+        return None
+    with path.open("rb") as f:
+        raw = f.read(_ASIGNADOS_HEADER.size)
+    if len(raw) != _ASIGNADOS_HEADER.size:
+        return None
+    header = _ASIGNADOS_HEADER.unpack(raw)
+    return header if header[0] == _ASIGNADOS_MAGIC else None
+
+
+def _write_asignados(asignados: Dict[int, str], path: Path = ASIGNADOS_PATH) -> None:
+    overlay_size = OVERLAY_PATH.stat().st_size if OVERLAY_PATH.exists() else 0
+    inode, head = registro_identity()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        f.write(_ASIGNADOS_HEADER.pack(_ASIGNADOS_MAGIC, overlay_size, inode, head))
+        f.write(b"".join(
+            _ASIGNADOS_RECORD.pack(off, tid.encode("ascii"))
+            for off, tid in asignados.items()
+        ))
+
+
+def _rebuild_asignados(registro_changed: bool) -> Dict[int, str]:
+    """
+    Reconstruye {offset: testigo_id} desde el overlay. Usa el offset guardado
+    en cada línea del overlay; si falta o el registro fue reescrito, resuelve
+    las claves (artefact_id, hash10) recorriendo el registro completo.
+    """
+    overlay = load_registro_overlay()
+    asignados: Dict[int, str] = {}
+    pending: Dict[Tuple[str, str], str] = {}
+    for key, patch in overlay.items():
+        tid = patch.get("testigo_id")
+        if not tid:
+            continue
+        if "offset" in patch and not registro_changed:
+            asignados[int(patch["offset"])] = str(tid)
+        else:
+            pending[key] = str(tid)
+    if pending:
+        for off, entry in iter_registro_with_offsets():
+            tid = pending.get(registro_key(entry))
+            if tid:
+                asignados[off] = tid
+    return asignados
+
+
+def load_asignados(path: Path = ASIGNADOS_PATH) -> Dict[int, str]:
+    """
+    Devuelve {offset en el registro: testigo_id} de los frutos ya asignados.
+
+    Se lee de una proyección binaria del overlay; solo se vuelve a parsear el
+    overlay si este cambió de tamaño o si el registro fue reescrito.
+    """
+    header = _read_asignados_header(path)
+    overlay_size = OVERLAY_PATH.stat().st_size if OVERLAY_PATH.exists() else 0
+    identity = registro_identity()
+    registro_changed = header is not None and (header[2], header[3]) != identity
+    if header is not None and not registro_changed and header[1] == overlay_size:
+        with path.open("rb") as f:
+            f.seek(_ASIGNADOS_HEADER.size)
+            data = f.read()
+        return {
+            off: tid.rstrip(b"\x00").decode("ascii")
+            for off, tid in _ASIGNADOS_RECORD.iter_unpack(data)
+        }
+    asignados = _rebuild_asignados(registro_changed)
+    _write_asignados(asignados, path)
+    return asignados
+
+
+# -----------------------------
+# Candidatos
+# -----------------------------
+
+def suggest_candidates(
+    asignados: Dict[int, str],
+    threshold: float = UMBRAL_TESTIGO,
+) -> List[Tuple[List[int], Dict[str, object]]]:
+    """
+    Frutos sellados con Φ_CLACS > threshold que aún no tienen testigo.
+    Devuelve ([offsets], entrada); varios offsets si el mismo fruto se selló
+    más de una vez. Los ya asignados se descartan sin leer el registro.
+    """
+    phis, offsets = update_phi_index()
+    candidates: List[Tuple[List[int], Dict[str, object]]] = []
+    by_key: Dict[Tuple[str, str], List[int]] = {}
+    for off, entry in iter_registro_above(
+        phis, offsets, threshold, exclude_offsets=asignados.keys(),
+    ):
+        if entry.get("testigo_id"):
+            continue
+        key = registro_key(entry)
+        if key in by_key:
+            by_key[key].append(off)
+            continue
+        by_key[key] = [off]
+        candidates.append((by_key[key], entry))
+    return candidates
+
+
+def group_candidates(
+    candidates: List[Tuple[List[int], Dict[str, object]]],
+) -> Dict[Tuple[str, str], List[Tuple[List[int], Dict[str, object]]]]:
+    groups: Dict[Tuple[str, str], List[Tuple[List[int], Dict[str, object]]]] = {}
+    for cand in candidates:
+        entry = cand[1]
+        key = (str(entry.get("campo_id", "")), str(entry.get("sesion_id", "")))
+        groups.setdefault(key, []).append(cand)
+    return dict(sorted(groups.items()))
+
+
+def assign_groups(
+    groups: Dict[Tuple[str, str], List[Tuple[List[int], Dict[str, object]]]],
+    testigo_ids: List[str],
+    asignados: Dict[int, str],
+) -> Dict[str, List[Tuple[Tuple[str, str], List[Tuple[List[int], Dict[str, object]]]]]]:
+    """
+    Reparte cada grupo (campo, sesión) completo al testigo con menos frutos
+    asignados hasta ahora (contando los ya presentes en `asignados`).
+    """
+    load = {tid: 0 for tid in testigo_ids}
+    for tid in asignados.values():
+        if tid in load:
+            load[tid] += 1
+    assignments: Dict[str, List[Tuple[Tuple[str, str], List[Tuple[List[int], Dict[str, object]]]]]] = {}
+    for key, cands in groups.items():
+        tid = min(testigo_ids, key=lambda t: (load[t], t))
+        load[tid] += len(cands)
+        assignments.setdefault(tid, []).append((key, cands))
+    return assignments
+
+
+# -----------------------------
+# Evidencias
+# -----------------------------
+
+def format_evidencias_block(
+    campo_id: str,
+    sesion_id: str,
+    cands: List[Tuple[List[int], Dict[str, object]]],
+) -> str:
+    lines = [f"\n### Campo {campo_id} · Sesión {sesion_id}\n\n"]
+    for _, e in cands:
+        lines.append(f"- Artefacto: {e.get('artefact_id')}\n")
+        lines.append(f"  - Fruto: {e.get('ruta_fruto')}\n")
+        lines.append(f"  - Campo: {campo_id}\n")
+        lines.append(f"  - Φ_CLACS: {float(e.get('phi_clacs', 0.0)):.4f}\n")
+        lines.append(f"  - hash10: {e.get('hash10')}\n")
+        lines.append("  - Fecha de validación: (pendiente)\n")
+        lines.append('  - Comentario: ""\n')
+    return "".join(lines)
+
+
+def write_evidencias(
+    assignments: Dict[str, List[Tuple[Tuple[str, str], List[Tuple[List[int], Dict[str, object]]]]]],
+    testigos: Dict[str, Path],
+    asignados: Dict[int, str],
+) -> List[Path]:
+    """
+    Escribe (o amplía) W###_evidencias.md de cada testigo con una sola
+    apertura por archivo, registra los testigo_id en el overlay en bloque
+    y actualiza `asignados` y su proyección binaria.
+    """
+    now_iso = datetime.now().isoformat(timespec="seconds")
+    written: List[Path] = []
+    updates: List[Dict[str, object]] = []
+    for tid, blocks in assignments.items():
+        path = testigos[tid] / f"{tid}_evidencias.md"
+        header = "" if path.exists() else f"# {tid} · Evidencias\n"
+        text = header + "".join(
+            format_evidencias_block(campo_id, sesion_id, cands)
+            for (campo_id, sesion_id), cands in blocks
+        )
+        with path.open("a", encoding="utf-8") as f:
+            f.write(text)
+        written.append(path)
+        for _, cands in blocks:
+            for offs, e in cands:
+                artefact_id, hash10 = registro_key(e)
+                updates.append({
+                    "artefact_id": artefact_id,
+                    "hash10": hash10,
+                    "testigo_id": tid,
+                    "timestamp_testigo": now_iso,
+                    "offset": offs[0],
+                })
+                for off in offs:
+                    asignados[off] = tid
+    append_registro_overlay(updates)
+    _write_asignados(asignados)
+    return written
+
+
+# -----------------------------
+# Main
+# -----------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sugiere candidatos a Escrito Testigo y genera evidencias por testigo."
+    )
+    parser.add_argument("--umbral", type=float, default=UMBRAL_TESTIGO,
+                        help="Φ_CLACS mínimo (exclusivo) para ser candidato")
+    parser.add_argument("--testigo", action="append", default=None,
+                        help="restringe la asignación a este testigo (repetible, p.ej. W001)")
+    parser.add_argument("--listar", action="store_true",
+                        help="solo lista candidatos; no escribe evidencias ni overlay")
+    args = parser.parse_args()
+
+    try:
+        asignados = load_asignados()
+        candidates = suggest_candidates(asignados, args.umbral)
+        groups = group_candidates(candidates)
+        print(f"\nCandidatos a Escrito Testigo (Φ > {args.umbral}): {len(candidates)}")
+        for (campo_id, sesion_id), entries in groups.items():
+            print(f"  - {campo_id} · {sesion_id}: {len(entries)} frutos")
+        if args.listar or not candidates:
+            return
+
+        testigos = list_testigos()
+        if args.testigo:
+            unknown = [t for t in args.testigo if t not in testigos]
+            if unknown:
+                raise ValueError(f"Testigos no encontrados en {TESTIGOS_DIR}/: {', '.join(unknown)}")
+            testigos = {t: testigos[t] for t in args.testigo}
+        if not testigos:
+            raise ValueError(f"No hay carpetas de testigos en {TESTIGOS_DIR}/ (p.ej. W001_Nombre-Simbolico).")
+
+        assignments = assign_groups(groups, sorted(testigos), asignados)
+        written = write_evidencias(assignments, testigos, asignados)
+        print("\nEvidencias actualizadas:")
+        for path in written:
+            print(f"  - {path}")
+    except Exception as e:
+        print(f"Error al procesar testigos: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()